@@ -5,61 +5,101 @@ IMPROVED VERSION - Finds all matches and selects the correct section heading
 
 import os
 import re
-from bs4 import BeautifulSoup
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
 from pathlib import Path
 
+# Prefer the C-backed lxml parser; fall back to the pure-Python one
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# 10-K filings are XHTML (inline XBRL); we deliberately parse them as HTML
+warnings.filterwarnings('ignore', category=XMLParsedAsHTMLWarning)
+
+# Precompiled patterns (compiled once at import instead of on every call)
+_WS = re.compile(r'\s+')
+_BULLETS = re.compile(r'[•·▪]')
+# Sentence end: punctuation followed by whitespace and a capital, or end of text
+_SENT_SPLIT = re.compile(r'(?<=[.!?])(?:\s+(?=[A-Z])|$)')
+_NUM_ONLY = re.compile(r'^\s*\d+\s*$')
+
+_ITEM1A_UNION = re.compile(
+    r'^\s*Item\s*1A(?:\.?\s*Risk\s*Factors)?\.?\s*$', re.IGNORECASE)
+_NEXT_MAJOR = re.compile(r'^\s*Item\s*(?:1B|2[^0-9])', re.IGNORECASE)
+
+_NEXT_ITEM = re.compile(r'\bITEM\s*(1B|2)\b', re.IGNORECASE)
+
+# Tag sets (frozensets for O(1) membership checks)
+_HN_TAGS = frozenset(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+_BLOCK_TAGS = frozenset(['p', 'div'])
+_INLINE_TAGS = frozenset(['b', 'strong', 'span', 'i', 'em'])
+# Elements that may hold the Item 1A heading
+_HEADING_TAGS = _BLOCK_TAGS | {'span', 'td'} | _HN_TAGS
+# Elements whose text is scored as content following a candidate
+_LOOKAHEAD_TAGS = frozenset(['p', 'div', 'span', 'td'])
+# Elements whose text is extracted as section content
+_CONTENT_TAGS = _LOOKAHEAD_TAGS | {'li'}
+# Elements whose stripped text is cached and searched for section headings
+_TEXT_TAGS = _LOOKAHEAD_TAGS | _HN_TAGS
+
+# Phrases that mark a cross-reference to Item 1A rather than the heading itself
+REFERENCE_INDICATORS = (
+    'described in', 'see', 'refer to', 'factors in', 'included in',
+    'discussed in', 'contained in', 'set forth in', 'presented in',
+    'disclosed in', 'other factors', 'additional information',
+    'for more information', 'as described in', 'further discussed in',
+    'more fully described', 'conjunction with', 'forward-looking',
+    'annual report on form'
+)
+
+# Words typical of risk factor content following the real heading
+RISK_KEYWORDS = (
+    'risk', 'uncertain', 'could', 'may', 'might',
+    'adverse', 'factor', 'subject to', 'depend', 'fail'
+)
+
 
 def clean_text(text):
     """Clean extracted text"""
-    # Remove extra whitespace
-    text = re.sub(r'\s+', ' ', text)
-    # Remove non-breaking spaces
-    text = text.replace('\xa0', ' ')
-    # Remove extra spaces
-    text = text.strip()
-    return text
+    # Collapse whitespace runs (\s also covers non-breaking spaces) and trim
+    return _WS.sub(' ', text).strip()
 
 
-def score_candidate(element, text, soup):
+def score_candidate(nodes, texts, i, text):
     """
-    Score a potential Item 1A heading candidate.
+    Score a potential Item 1A heading candidate at position i in nodes.
     Higher score = more likely to be the actual section heading.
-    Returns (score, element)
+    Returns score
     """
+    element = nodes[i]
     score = 0
 
     # Check element's own text
-    element_text = element.get_text(strip=True)
+    element_text = texts[i]
 
     # Bonus points for being a standalone element (text matches closely)
     if len(element_text) <= len(text) + 15:
         score += 50
 
     # Bonus for being in a heading tag
-    if element.name in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
+    if element.name in _HN_TAGS:
         score += 30
 
     # Bonus for being in a paragraph (common for 10-K headings)
-    if element.name in ['p', 'div']:
+    if element.name in _BLOCK_TAGS:
         score += 20
 
     # Penalty for being nested in inline formatting
-    if element.name in ['b', 'strong', 'span', 'i', 'em']:
+    if element.name in _INLINE_TAGS:
         score -= 20
 
-    # Check for reference indicators in element or parent
-    reference_indicators = [
-        'described in', 'see', 'refer to', 'factors in', 'included in',
-        'discussed in', 'contained in', 'set forth in', 'presented in',
-        'disclosed in', 'other factors', 'additional information',
-        'for more information', 'as described in', 'further discussed in',
-        'more fully described', 'conjunction with', 'forward-looking',
-        'annual report on form'
-    ]
-
     # Check element text for reference indicators
     element_lower = element_text.lower()
-    if any(indicator in element_lower for indicator in reference_indicators):
+    if any(indicator in element_lower for indicator in REFERENCE_INDICATORS):
         score -= 100  # Heavy penalty
 
     # Check parent text (if parent is small enough to be a single paragraph)
@@ -68,31 +108,27 @@ def score_candidate(element, text, soup):
         parent_text = parent.get_text(strip=True)
         if len(parent_text) < 500:  # Only check if parent is reasonably sized
             parent_lower = parent_text.lower()
-            if any(indicator in parent_lower for indicator in reference_indicators):
+            if any(indicator in parent_lower for indicator in REFERENCE_INDICATORS):
                 score -= 80
 
     # Check what comes AFTER this element - real headings have risk factor content after them
     next_content = []
-    current = element.find_next()
     chars_collected = 0
-    count = 0
 
-    while current and count < 20 and chars_collected < 2000:
-        if current.name in ['p', 'div', 'span', 'td']:
-            next_text = current.get_text(strip=True)
+    for j in range(i + 1, min(i + 21, len(nodes))):
+        if chars_collected >= 2000:
+            break
+        if nodes[j].name in _LOOKAHEAD_TAGS:
+            next_text = texts[j]
             if next_text and len(next_text) > 10:
                 next_content.append(next_text)
                 chars_collected += len(next_text)
-        current = current.find_next()
-        count += 1
 
     combined_next = ' '.join(next_content).lower()
 
     # Check for risk factor keywords in following content
-    risk_keywords = ['risk', 'uncertain', 'could', 'may', 'might',
-                     'adverse', 'factor', 'subject to', 'depend', 'fail']
     risk_count = sum(
-        1 for keyword in risk_keywords if keyword in combined_next)
+        1 for keyword in RISK_KEYWORDS if keyword in combined_next)
     score += risk_count * 5  # Bonus for each risk keyword
 
     # Bonus for substantial content following
@@ -103,119 +139,108 @@ def score_candidate(element, text, soup):
 
     # Check if next major item section appears (Item 1B, Item 2)
     # This validates we're in the right place in the document
-    next_item_patterns = [
-        r'\bITEM\s*1B\b',
-        r'\bItem\s*1B\b',
-        r'\bITEM\s*2\b',
-        r'\bItem\s*2\b',
-    ]
-
-    if any(re.search(pattern, combined_next, re.IGNORECASE) for pattern in next_item_patterns):
+    if _NEXT_ITEM.search(combined_next):
         score += 20  # Bonus for having next section marker
 
     return score
 
 
-def find_all_item1a_candidates(soup):
+def is_next_major_section(element, text):
+    """Check whether an element is the heading of Item 1B / Item 2"""
+    if element.name not in _TEXT_TAGS:
+        return False
+
+    # Cheap literal prefilter before running the regex
+    low = text[:40].lower()
+    if 'item' not in low or ('1b' not in low and '2' not in low):
+        return False
+
+    return bool(_NEXT_MAJOR.match(text))
+
+
+def find_all_item1a_candidates(nodes, texts):
     """
     Find ALL potential Item 1A heading matches and score them.
-    Returns list of (score, element) tuples sorted by score.
+    Returns (candidates, section_starts): a list of (score, index, text)
+    tuples sorted by score, and the indices of all next major section
+    headings (Item 1B / Item 2) in document order.
     """
-    patterns = [
-        r'^\s*ITEM\s*1A\.?\s*RISK\s*FACTORS\.?\s*$',
-        r'^\s*Item\s*1A\.?\s*Risk\s*Factors\.?\s*$',
-    ]
-
     candidates = []
+    section_starts = []
 
     # Search through relevant elements
-    for element in soup.find_all(['p', 'div', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'span', 'td']):
-        text = element.get_text(strip=True)
+    for i, element in enumerate(nodes):
+        text = texts[i]
+
+        # Record section ends on the same pass, so extraction needn't rescan
+        if is_next_major_section(element, text):
+            section_starts.append(i)
+
+        if element.name not in _HEADING_TAGS:
+            continue
+
+        # Cheap literal prefilter: headings are short and start with "Item 1A"
+        if len(text) > 80:
+            continue
+        low = text[:40].lower()
+        if 'item' not in low or '1a' not in low:
+            continue
 
-        # Check if this matches any pattern
-        for pattern in patterns:
-            if re.match(pattern, text, re.IGNORECASE):
-                score = score_candidate(element, text, soup)
-                candidates.append((score, element, text))
-                break  # Don't double-count
+        # Check if this matches the Item 1A heading pattern
+        if _ITEM1A_UNION.match(text):
+            score = score_candidate(nodes, texts, i, text)
+            candidates.append((score, i, text))
 
     # Sort by score (highest first)
     candidates.sort(key=lambda x: x[0], reverse=True)
 
-    return candidates
+    return candidates, section_starts
 
 
-def find_item1a_start(soup):
+def find_item1a_start(nodes, texts):
     """
     Find the start of Item 1A Risk Factors section by finding all candidates
     and selecting the best one.
+    Returns (start, end): the index of the heading in nodes and the index
+    of the next major section (None if there is none), or (None, None).
     """
-    candidates = find_all_item1a_candidates(soup)
+    candidates, section_starts = find_all_item1a_candidates(nodes, texts)
 
     if not candidates:
-        return None
+        return None, None
 
-    # Return the highest-scoring candidate
-    best_score, best_element, best_text = candidates[0]
+    # Use the highest-scoring candidate
+    best_score, best_index, best_text = candidates[0]
 
     # Only accept if score is positive (otherwise even best match is suspicious)
-    if best_score > 0:
-        return best_element
-
-    return None
-
-
-def find_next_major_section(element):
-    """
-    Find the next major section after Item 1A (like Item 1B, Item 2, etc.)
-    """
-    patterns = [
-        r'^\s*ITEM\s*1B',
-        r'^\s*Item\s*1B',
-        r'^\s*ITEM\s*2[^0-9]',
-        r'^\s*Item\s*2[^0-9]',
-    ]
-
-    current = element
-    while current:
-        current = current.find_next()
-        if not current:
-            break
+    if best_score <= 0:
+        return None, None
 
-        if current.name in ['p', 'div', 'span', 'td', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
-            text = current.get_text(strip=True)
-            for pattern in patterns:
-                if re.search(pattern, text, re.IGNORECASE):
-                    return current
+    # The end is the first section heading after the start
+    end = next((j for j in section_starts if j > best_index), None)
 
-    return None
+    return best_index, end
 
 
-def extract_item1a_content(soup):
+def extract_item1a_content(nodes, texts):
     """Extract the content of Item 1A Risk Factors"""
 
-    # Find start of Item 1A
-    start_element = find_item1a_start(soup)
-    if not start_element:
+    # Find start and end (next major section) of Item 1A
+    start, end = find_item1a_start(nodes, texts)
+    if start is None:
         return None
 
-    # Find end (next major section)
-    end_element = find_next_major_section(start_element)
-
     # Extract all text between start and end
     content_parts = []
-    current = start_element.find_next()
 
-    while current and current != end_element:
-        if current.name in ['p', 'div', 'span', 'td', 'li']:
+    for current in nodes[start + 1:end]:
+        if current.name in _CONTENT_TAGS:
             text = current.get_text(separator=' ', strip=True)
             if text and len(text) > 10:  # Skip very short snippets
                 # Check if this looks like a table of contents
-                if not re.search(r'^\s*\d+\s*$', text) and 'Table of Contents' not in text:
+                if not _NUM_ONLY.search(text) and 'Table of Contents' not in text:
                     content_parts.append(text)
 
-        current = current.find_next()
-
     # Combine all parts
     full_text = ' '.join(content_parts)
     return clean_text(full_text)
@@ -225,11 +250,8 @@ def split_into_sentences(text):
     """
     Split text into sentences, handling bullet points
     """
-    # First, identify bullet points and replace them with special markers
-    text = re.sub(r'[•·▪]', '|||BULLET|||', text)
-
-    # Split on bullet markers
-    parts = text.split('|||BULLET|||')
+    # Split on bullet points
+    parts = _BULLETS.split(text)
 
     sentences = []
     for part in parts:
@@ -238,8 +260,7 @@ def split_into_sentences(text):
 
         # Split on sentence endings, but be careful with abbreviations
         # Look for period/question mark/exclamation followed by space and capital letter or end of string
-        sentence_endings = re.split(
-            r'(?<=[.!?])\s+(?=[A-Z])|(?<=[.!?])$', part)
+        sentence_endings = _SENT_SPLIT.split(part)
 
         for sent in sentence_endings:
             sent = sent.strip()
@@ -249,20 +270,28 @@ def split_into_sentences(text):
     return sentences
 
 
-def format_output(sentences):
-    """Format sentences according to requirements"""
-    # Escape single quotes in sentences
-    escaped_sentences = [s.replace("'", "\\'") for s in sentences]
+def format_output(sentences, out):
+    """Write sentences to out according to requirements"""
+    out.write("['")
 
-    # Join with ', '
-    output = "['" + "', '".join(escaped_sentences) + "']"
+    for n, sentence in enumerate(sentences):
+        # Join with ', '
+        if n:
+            out.write("', '")
+        # Escape backslashes and single quotes so the output stays a valid
+        # single-quoted Python list literal. Chained replace() is used on
+        # purpose: str.translate with multi-character replacements takes a
+        # slow per-character path and is much slower here.
+        out.write(sentence.replace('\\', '\\\\').replace("'", "\\'"))
 
-    return output
+    out.write("']")
 
 
 def process_file(input_path, output_path):
     """Process a single HTML file"""
-    print(f"Processing {input_path.name}...")
+    # Collect this file's messages and print them in one go at the end, so
+    # output from parallel workers does not interleave
+    log = [f"Processing {input_path.name}..."]
 
     try:
         # Read HTML file
@@ -270,38 +299,54 @@ def process_file(input_path, output_path):
             html_content = f.read()
 
         # Parse HTML
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = BeautifulSoup(html_content, HTML_PARSER)
+
+        # Flatten the document into a list of tags (document order) once,
+        # so all later scans are index based instead of find_next() walks
+        nodes = soup.find_all(True)
+
+        # Compute each relevant element's text once; the scans below only
+        # ever look at the stripped text of these tags
+        texts = [
+            node.get_text(strip=True) if node.name in _TEXT_TAGS else ''
+            for node in nodes
+        ]
 
         # Extract Item 1A content
-        item1a_text = extract_item1a_content(soup)
+        item1a_text = extract_item1a_content(nodes, texts)
 
         if not item1a_text:
-            print(f"  ⚠ Could not find Item 1A section in {input_path.name}")
+            log.append(f"  ⚠ Could not find Item 1A section in {input_path.name}")
             return False
 
         # Split into sentences
         sentences = split_into_sentences(item1a_text)
 
         if not sentences:
-            print(f"  ⚠ No sentences extracted from {input_path.name}")
+            log.append(f"  ⚠ No sentences extracted from {input_path.name}")
             return False
 
-        # Format output
-        output_text = format_output(sentences)
-
-        # Write to output file
+        # Write formatted output straight to the output file
         output_file = output_path / (input_path.stem + '.txt')
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(output_text)
-
-        print(
+        try:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                format_output(sentences, f)
+        except Exception:
+            # Don't leave a truncated output file behind
+            output_file.unlink(missing_ok=True)
+            raise
+
+        log.append(
             f"  ✓ Extracted {len(sentences)} sentences to {output_file.name}")
         return True
 
     except Exception as e:
-        print(f"  ✗ Error processing {input_path.name}: {str(e)}")
+        log.append(f"  ✗ Error processing {input_path.name}: {str(e)}")
         return False
 
+    finally:
+        print('\n'.join(log), flush=True)
+
 
 def main():
     """Main function"""
@@ -318,8 +363,10 @@ def main():
     # Create output directory if it doesn't exist
     output_dir.mkdir(exist_ok=True)
 
-    # Get all HTML files
-    html_files = list(input_dir.glob('*.html')) + list(input_dir.glob('*.htm'))
+    # Get all HTML files (single directory scan)
+    with os.scandir(input_dir) as entries:
+        html_files = [Path(entry.path) for entry in entries
+                      if entry.name.endswith(('.html', '.htm')) and entry.is_file()]
 
     if not html_files:
         print(f"No HTML files found in {input_dir}")
@@ -327,11 +374,14 @@ def main():
 
     print(f"Found {len(html_files)} HTML files\n")
 
-    # Process each file
+    # Process files in parallel; each file is independent and CPU-bound
     success_count = 0
-    for html_file in html_files:
-        if process_file(html_file, output_dir):
-            success_count += 1
+    with ProcessPoolExecutor() as executor:
+        futures = [executor.submit(process_file, html_file, output_dir)
+                   for html_file in html_files]
+        for future in as_completed(futures):
+            if future.result():
+                success_count += 1
 
     print(f"\n{'='*60}")
     print(f"Processing complete!")